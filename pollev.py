@@ -10,47 +10,35 @@ import sys
 import logging
 from datetime import datetime
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main function to run the PollEv bot."""
-    logger.info("Starting PollEv Bot")
-    logger.info(f"Current time: {datetime.now()}")
-    
-    # Try to load .env file (for local development)
+def _maybe_load_dotenv():
+    """Load a local .env file; skipped in CI, where secrets come from the environment."""
+    if os.getenv('GITHUB_ACTIONS') or os.getenv('CI'):
+        return
     try:
         import dotenv
-        dotenv.load_dotenv()
-        logger.info("Loaded environment from .env file")
     except ImportError:
         logger.info("python-dotenv not available, using environment variables directly")
-    except Exception as e:
-        logger.warning(f"Could not load .env file: {e}")
+        return
+    dotenv.load_dotenv()
+    logger.info("Loaded environment from .env file")
 
-    # Get environment variables
-    user = os.getenv('EMAIL')
-    password = os.getenv('PASSWORD')
-    host = os.getenv('HOST')
+def main():
+    """Main function to run the PollEv bot."""
+    logger.info("Starting PollEv Bot")
+    logger.info(f"Current time: {datetime.now()}")
     
-    # Validate required environment variables
-    if not user:
-        logger.error("EMAIL environment variable not set")
-        return 1
-    if not password:
-        logger.error("PASSWORD environment variable not set")
-        return 1
-    if not host:
-        logger.error("HOST environment variable not set")
+    _maybe_load_dotenv()
+
+    # Get and validate required environment variables
+    env = os.environ
+    creds = {k: env.get(k) for k in ('EMAIL', 'PASSWORD', 'HOST')}
+    missing = [k for k, v in creds.items() if not v]
+    if missing:
+        logger.error(f"Missing environment variables: {', '.join(missing)}")
         return 1
+    user, password, host = creds['EMAIL'], creds['PASSWORD'], creds['HOST']
     
     logger.info(f"Bot configuration:")
     logger.info(f"  Email: {user}")
@@ -76,6 +64,15 @@ def main():
     return 0
 
 if __name__ == "__main__":
+    # Set up logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
     exit_code = main()
     logger.info(f"Bot script exiting with code: {exit_code}")
     sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Lock-free ring buffer carrying bot log lines to the Streamlit UI."""
+
+from typing import List, Optional, Tuple
+
+
+class RingLog:
+    """Fixed-capacity single-producer ring buffer with per-reader cursors.
+
+    The producer (:class:`streamlit_app.BotThread`) is the only writer and
+    only advances ``tail``. Readers keep their own cursor (one per Streamlit
+    session, so several tabs re-attached to one bot each see every line) and
+    never write to the buffer, so neither side needs a lock. When the
+    producer laps a reader the oldest unread entries are overwritten.
+
+    The buffer holds one slot more than ``cap``. ``push`` stores before it
+    advances ``tail``, and that pending store always lands in the spare slot,
+    never in one a reader may be copying.
+    """
+
+    __slots__ = ("buf", "tail", "cap")
+
+    def __init__(self, cap: int) -> None:
+        self.buf: List[Optional[Tuple[str, str]]] = [None] * (cap + 1)
+        self.tail = 0
+        self.cap = cap
+
+    def push(self, item: Tuple[str, str]) -> None:
+        """Append *item*, overwriting the oldest entry when full."""
+        self.buf[self.tail % (self.cap + 1)] = item
+        self.tail += 1
+
+    def drain_into(self, out: List[Tuple[str, str]], cursor: int) -> int:
+        """Append every entry written since *cursor* to *out* and return the
+        reader's new cursor."""
+        tail = self.tail
+        start = max(cursor, tail - self.cap)
+        if tail <= start:
+            return tail
+        size = self.cap + 1
+        lo, hi = start % size, tail % size
+        batch = self.buf[lo:hi] if lo < hi else self.buf[lo:] + self.buf[:hi]
+        # Each store the producer made while we sliced may have reused the
+        # slot of one of the oldest entries in *batch*; drop those.
+        advanced = self.tail - tail
+        lost = advanced - (start - (tail - self.cap))
+        if lost > 0:
+            batch = batch[lost:]
+        out.extend(batch)
+        return tail
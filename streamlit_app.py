@@ -1,13 +1,51 @@
+"""Streamlit front-end for running PollEv bots in background threads.
+
+Running bots live in a process-wide manager (see :func:`get_bot_manager`)
+shared by every session. Writes and iteration must hold ``_manager_lock``;
+only single-key reads via ``manager.get(token)`` are safe without it.
+"""
+
 import threading
-import queue
 import time
-from typing import Optional, List, Dict, Any
+import weakref
+from collections import deque
+from typing import Optional, List, Dict, Tuple
 
 from uuid import uuid4
 
 import streamlit as st
 from pollevbot import PollBot
 
+from ringlog import RingLog
+
+# Capacity of the per-bot log channel; older unread lines are overwritten.
+LOG_QUEUE_SIZE = 5000
+# Number of log lines kept (and rendered) per session.
+LOG_HISTORY_SIZE = 1000
+
+# Preformatted console line per log level; colors come from LOG_STYLES.
+COLOR_TEMPLATES: Dict[str, str] = {
+    "ERROR": "<span class='lvl-error'>{}</span><br>",
+    "SUCCESS": "<span class='lvl-success'>{}</span><br>",
+    "POLL": "<span class='lvl-poll'>{}</span><br>",
+    "DEBUG": "<span class='lvl-debug'>{}</span><br>",
+    "INFO": "<span class='lvl-info'>{}</span><br>",
+}
+DEFAULT_TPL = COLOR_TEMPLATES["INFO"]
+
+LOG_STYLES = (
+    "<style>"
+    ".lvl-error{color:red}.lvl-success{color:green}.lvl-poll{color:yellow}"
+    ".lvl-debug{color:white}.lvl-info{color:blue}"
+    "</style>"
+)
+
+# Seconds between reruns of the log-console fragment.
+LOG_REFRESH_SECONDS = 1.0
+
+# Opening tag of the log console container.
+HEADER_DIV = "<div style='border: 1px solid #ffffff; background-color: black; padding: 10px; border-radius: 10px; font-family: monospace; flex-grow: 1; max-height: 60vh; overflow-y: auto;'>"
+
 
 class BotThread(threading.Thread):
     """Thread wrapper around :class:`pollevbot.PollBot` to enable
@@ -20,7 +58,7 @@ class BotThread(threading.Thread):
         host: str,
         login_type: str,
         lifetime: float,
-        log_queue: "queue.Queue[str]",
+        log_queue: RingLog,
         token: str
     ) -> None:
         super().__init__(daemon=True)
@@ -34,11 +72,19 @@ class BotThread(threading.Thread):
         )
         self._log_queue = log_queue
         self._token = token
+        # Set by BotHandle; keeps the handle referenced while the thread runs.
+        self.handle: Optional["BotHandle"] = None
+        # Formatted timestamp cached per wall-clock second for _log.
+        self._ts_cache_sec = 0
+        self._ts_cache_str = ""
     # ---------------------------------------------------------------------
     # Public helpers
     # ---------------------------------------------------------------------
     def stop(self) -> None:
-        """Signal the thread to stop and wait at most five seconds."""
+        """Signal the thread to stop and wait at most five seconds.
+
+        Pending waits in :meth:`run` are interrupted immediately.
+        """
         self._stop_event.set()
         self.join(timeout=5.0)
 
@@ -46,9 +92,14 @@ class BotThread(threading.Thread):
     # Internal helpers
     # ------------------------------------------------------------------
     def _log(self, msg: str, level: str = "INFO") -> None:
-        """Push *msg* to the log queue along with a timestamp and level."""
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        self._log_queue.put(f"[{timestamp}] [{level}] {msg}")
+        """Push ``(level, line)`` to the log queue, where *line* is *msg*
+        prefixed with a timestamp and level."""
+        now = int(time.time())
+        if now != self._ts_cache_sec:
+            self._ts_cache_sec = now
+            self._ts_cache_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        timestamp = self._ts_cache_str
+        self._log_queue.push((level, f"[{timestamp}] [{level}] {msg}"))
 
     # ------------------------------------------------------------------
     # Thread entry point
@@ -70,11 +121,13 @@ class BotThread(threading.Thread):
 
             if poll_id is None:
                 self._log("No new polls detected – sleeping …", "DEBUG")
-                time.sleep(self._bot.closed_wait)
+                if self._stop_event.wait(self._bot.closed_wait):
+                    break
                 continue
 
             self._log(f"Detected new poll {poll_id}. Waiting to answer …", "POLL")
-            time.sleep(self._bot.open_wait)
+            if self._stop_event.wait(self._bot.open_wait):
+                break
             response = self._bot.answer_poll(poll_id)
             self._log(f"Answered poll → {response}", "SUCCESS")
 
@@ -86,18 +139,40 @@ class BotThread(threading.Thread):
 # -------------------------------------------------------------------------
 
 
+class BotHandle:
+    """Weak-referenceable pairing of a :class:`BotThread` and its log queue.
+
+    The thread owns its handle (``BotThread.handle``), so the handle lives
+    as long as the thread is running or a session still references the
+    thread; after that the manager entry disappears.
+    """
+
+    def __init__(self, thread: BotThread, log_queue: RingLog) -> None:
+        self.thread = thread
+        self.log_queue = log_queue
+        thread.handle = self
+
+
+_manager_lock = threading.Lock()
+
+
 @st.cache_resource(show_spinner=False)
-def get_bot_manager() -> Dict[str, Dict[str, Any]]:
+def get_bot_manager() -> "weakref.WeakValueDictionary[str, BotHandle]":
     """Process-wide storage for running bots keyed by a unique token.
 
-    Each entry is a mapping with keys:
-        • "thread": BotThread
-        • "log_queue": queue.Queue[str]
-    This survives across browser sessions until the Streamlit process is
-    restarted.
+    Values are weakly referenced :class:`BotHandle` objects. This survives
+    across browser sessions until the Streamlit process is restarted.
     """
 
-    return {}
+    return weakref.WeakValueDictionary()
+
+
+def _reap_dead(manager: "weakref.WeakValueDictionary[str, BotHandle]") -> None:
+    """Drop *manager* entries whose bot thread has finished."""
+    with _manager_lock:
+        for token, handle in list(manager.items()):
+            if not handle.thread.is_alive():
+                manager.pop(token, None)
 
 
 # -------------------------------------------------------------------------
@@ -107,8 +182,10 @@ def init_session_state() -> None:
     """Ensure required keys exist in *st.session_state*."""
     defaults = {
         "bot_thread": None,
-        "log_queue": queue.Queue(),
-        "logs": [],
+        "log_queue": RingLog(LOG_QUEUE_SIZE),
+        "log_cursor": 0,
+        "logs_html": deque(maxlen=LOG_HISTORY_SIZE),
+        "console_html": None,
         "token": None
     }
     for key, value in defaults.items():
@@ -116,126 +193,141 @@ def init_session_state() -> None:
             st.session_state[key] = value
 
 
-def flush_logs() -> None:
-    """Drain the internal queue into *st.session_state['logs']*."""
-    log_queue: "queue.Queue[str]" = st.session_state["log_queue"]
-    while not log_queue.empty():
-        st.session_state["logs"].append(log_queue.get())
-
-
-def colorize_log_line(log_line: str) -> str:
-    """Add color coding to log lines based on their level."""
-    if "[ERROR]" in log_line:
-        return f"<span style='color: red;'>{log_line}</span><br>"
-    elif "[SUCCESS]" in log_line:
-        return f"<span style='color: green;'>{log_line}</span><br>"
-    elif "[POLL]" in log_line:
-        return f"<span style='color: yellow;'>{log_line}</span><br>"
-    elif "[DEBUG]" in log_line:
-        return f"<span style='color: white;'>{log_line}</span><br>"
-    elif "[INFO]" in log_line:
-        return f"<span style='color: blue;'>{log_line}</span><br>"
-    else:
-        return f"<span style='color: white;'>{log_line}</span><br>"
+def flush_logs() -> int:
+    """Drain the internal queue into *st.session_state['logs_html']*.
+
+    Each line is colorized once here so reruns never recolorize history.
+    Returns the number of lines drained.
+    """
+    log_queue: RingLog = st.session_state["log_queue"]
+    batch: List[Tuple[str, str]] = []
+    st.session_state["log_cursor"] = log_queue.drain_into(
+        batch, st.session_state["log_cursor"]
+    )
+    st.session_state["logs_html"].extend(
+        colorize_log_line(line, level) for level, line in batch
+    )
+    return len(batch)
+
+
+def colorize_log_line(log_line: str, level: str) -> str:
+    """Add color coding to a log line based on its *level*."""
+    return COLOR_TEMPLATES.get(level, DEFAULT_TPL).format(log_line)
 
 # -------------------------------------------------------------------------
 # UI layout
 # -------------------------------------------------------------------------
 
-def credentials_form() -> None:
+def _start_bot(manager: "weakref.WeakValueDictionary[str, BotHandle]") -> None:
+    """Form-submit callback: validate credentials and launch a bot thread."""
+    user: str = st.session_state["cred_user"]
+    password: str = st.session_state["cred_password"]
+    host: str = st.session_state["cred_host"]
+    if not all(field and not field.isspace() for field in (user, password, host)):
+        st.error("Please provide username, password, and host.")
+        return
+
+    # Instantiate objects and save into session state —––––––––––––––––––––––
+    log_q = RingLog(LOG_QUEUE_SIZE)
+    token = uuid4().hex
+    bot_thread = BotThread(
+        user=user,
+        password=password,
+        host=host,
+        login_type=st.session_state["cred_login_type"],
+        lifetime=float(st.session_state["cred_lifetime"]),
+        log_queue=log_q,
+        token=token
+    )
+    bot_thread.start()
+
+    # Create unique token and store in global manager
+    handle = BotHandle(bot_thread, log_q)
+    with _manager_lock:
+        manager[token] = handle
+
+    # Persist token in URL and session state
+    st.query_params.update({"token": token})
+    st.session_state["token"] = token
+    st.session_state["bot_thread"] = bot_thread
+    st.session_state["log_queue"] = log_q
+    st.session_state["log_cursor"] = 0
+
+    st.success("Bot started! Scroll down to see real-time logs.")
+    # display the token in the url
+    st.write(f"Token: {token}")
+
+
+def _stop_bot(manager: "weakref.WeakValueDictionary[str, BotHandle]") -> None:
+    """Stop-button callback: stop the bot and forget its token."""
+    bot_thread: BotThread = st.session_state["bot_thread"]
+    bot_thread.stop()
+
+    # Remove from global manager
+    token = st.session_state.get("token")
+    if token:
+        with _manager_lock:
+            manager.pop(token, None)
+        # Clear token from URL
+        st.query_params.clear()
+
+    st.session_state["bot_thread"] = None
+    st.session_state["token"] = None
+    st.success("Bot stopped.")
+
+
+def credentials_form(manager: "weakref.WeakValueDictionary[str, BotHandle]") -> None:
     """Render the credentials form when the bot is not running."""
+    _reap_dead(manager)
     st.header("Configure and Start PollEv Bot")
     with st.form(key="credentials_form", clear_on_submit=False):
-        user = st.text_input("Username (e.g. netid@cornell.edu)", key="cred_user")
-        password = st.text_input("Password", type="password", key="cred_password")
-        host = st.text_input("PollEv Host", help="e.g. cs3410", key="cred_host")
-        login_type = st.selectbox(
+        st.text_input("Username (e.g. netid@cornell.edu)", key="cred_user")
+        st.text_input("Password", type="password", key="cred_password")
+        st.text_input("PollEv Host", help="e.g. cs3410", key="cred_host")
+        st.selectbox(
             "Login Type",
             options=["pollev", "uw"],
             help="Choose 'uw' for university SSO or 'pollev' for regular login.",
             key="cred_login_type",
         )
-        lifetime = st.number_input(
+        st.number_input(
             "Session Lifetime (seconds)",
             min_value=60,
             value=4800,
             step=60,
             key="cred_lifetime",
         )
-        submitted: bool = st.form_submit_button("Start Bot")
-
-    if submitted:
-        required: List[str] = [user, password, host]
-        if any(not field.strip() for field in required):
-            st.error("Please provide username, password, and host.")
-            return
-
-        # Instantiate objects and save into session state —––––––––––––––––––––––
-        log_q: "queue.Queue[str]" = queue.Queue()
-        token = uuid4().hex
-        bot_thread = BotThread(
-            user=user,
-            password=password,
-            host=host,
-            login_type=login_type,
-            lifetime=float(lifetime),
-            log_queue=log_q,
-            token=token
-        )
-        bot_thread.start()
+        # Streamlit reruns once after the callback, switching to the running layout.
+        st.form_submit_button("Start Bot", on_click=_start_bot, args=(manager,))
 
-        # Create unique token and store in global manager
-        manager = get_bot_manager()
-        manager[token] = {"thread": bot_thread, "log_queue": log_q}
 
-        # Persist token in URL and session state
-        st.query_params["token"] = token
-        st.session_state["token"] = token
-        st.session_state["bot_thread"] = bot_thread
-        st.session_state["log_queue"] = log_q
-
-        st.success("Bot started! Scroll down to see real-time logs.")
-        # display the token in the url
-        st.write(f"Token: {token}")
-        st.rerun()
-
-
-def running_layout() -> None:
+def running_layout(manager: "weakref.WeakValueDictionary[str, BotHandle]") -> None:
     """Render the UI when the bot is currently running."""
+    _reap_dead(manager)
     st.header("PollEv Bot – Running")
 
-    if st.button("Stop Bot", type="primary"):
-        bot_thread: BotThread = st.session_state["bot_thread"]
-        bot_thread.stop()
+    st.button("Stop Bot", type="primary", on_click=_stop_bot, args=(manager,))
 
-        # Remove from global manager
-        token = st.session_state.get("token")
-        if token:
-            manager = get_bot_manager()
-            manager.pop(token, None)
-            # Clear token from URL
-            st.query_params = {}
+    # Emitted outside the log fragment so refreshes don't resend it.
+    st.html(LOG_STYLES)
 
-        st.session_state["bot_thread"] = None
-        st.session_state["token"] = None
-        st.success("Bot stopped.")
-        st.rerun()
+    _log_view()
 
-    # Periodically refresh the logs.
-    flush_logs()
 
-    # Display newest entries at the top with color coding.
-    ordered_logs = list(reversed(st.session_state["logs"]))
-    colorized_logs = [colorize_log_line(log) for log in ordered_logs]
-    console_output = "<div style='border: 1px solid #ffffff; background-color: black; padding: 10px; border-radius: 10px; font-family: monospace; flex-grow: 1; max-height: 60vh; overflow-y: auto;'>"
-    for entry in colorized_logs:
-        console_output += f"{entry}"
-    console_output += "</div>"
-    st.html(body=console_output)
-# 
+@st.experimental_fragment(run_every=LOG_REFRESH_SECONDS)
+def _log_view() -> None:
+    """Render the log console; reruns on its own without a full-page rerun,
+    so each session's refresh never re-executes :func:`main`.
 
-    time.sleep(2)
-    st.rerun()
+    The console HTML is cached in *st.session_state['console_html']* and
+    only rebuilt when new lines have arrived. This saves CPU only: the whole
+    console is still sent to the browser on every refresh.
+    """
+    if flush_logs() or st.session_state.get("console_html") is None:
+        # Display newest entries at the top with color coding.
+        colorized_logs = reversed(st.session_state["logs_html"])
+        st.session_state["console_html"] = HEADER_DIV + "".join(colorized_logs) + "</div>"
+    st.html(body=st.session_state["console_html"])
 
 
 # -------------------------------------------------------------------------
@@ -244,27 +336,31 @@ def running_layout() -> None:
 
 def main() -> None:  # noqa: D401 – Simple imperative is fine here.
     st.set_page_config(page_title="PollEv Bot", page_icon="📊", layout="centered")
+    manager = get_bot_manager()
 
     # Attempt to restore from token in URL if no bot in session
     if st.session_state.get("bot_thread", None) is None:
         params = st.query_params
         token_param = params.get("token", None) if "token" in params else None
 
-        if token_param:
-            manager = get_bot_manager()
-            entry = manager.get(token_param)
-            if entry and entry["thread"]:
-                # Re-attach to running bot
-                st.session_state["bot_thread"] = entry["thread"]
-                st.session_state["log_queue"] = entry["log_queue"]
-                st.session_state["token"] = token_param
-                st.session_state["logs"] = []
-                running_layout()
+        entry = manager.get(token_param) if token_param else None
+        if entry and entry.thread:
+            # Re-attach to running bot
+            st.session_state["bot_thread"] = entry.thread
+            st.session_state["log_queue"] = entry.log_queue
+            st.session_state["log_cursor"] = 0
+            st.session_state["token"] = token_param
+            st.session_state["logs_html"] = deque(maxlen=LOG_HISTORY_SIZE)
+            st.session_state["console_html"] = None
+            running_layout(manager)
         else:
+            if token_param:
+                # Bot behind this token has finished; drop the stale token.
+                st.query_params.clear()
             init_session_state()
-            credentials_form()
+            credentials_form(manager)
     else:
-        running_layout()
+        running_layout(manager)
 
 
 if __name__ == "__main__":
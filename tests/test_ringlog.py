@@ -0,0 +1,88 @@
+import unittest
+
+from ringlog import RingLog
+
+
+def _items(*values):
+    return [("INFO", str(v)) for v in values]
+
+
+class RingLogTest(unittest.TestCase):
+    def test_drains_full_buffer_when_producer_idle(self):
+        ring = RingLog(4)
+        for item in _items(0, 1, 2, 3):
+            ring.push(item)
+
+        out = []
+        cursor = ring.drain_into(out, 0)
+
+        self.assertEqual(out, _items(0, 1, 2, 3))
+        self.assertEqual(cursor, 4)
+        self.assertEqual(ring.drain_into(out, cursor), 4)
+        self.assertEqual(out, _items(0, 1, 2, 3))
+
+    def test_drops_slots_overwritten_during_copy(self):
+        ring = RingLog(4)
+        for item in _items(0, 1, 2, 3, 4, 5):
+            ring.push(item)
+
+        class RacingList(list):
+            """Lets the producer push once, between the two wrap-around slices."""
+
+            raced = False
+
+            def __getitem__(self, key):
+                result = super().__getitem__(key)
+                if isinstance(key, slice) and not self.raced:
+                    self.raced = True
+                    ring.push(("INFO", "6"))
+                return result
+
+        ring.buf = RacingList(ring.buf)
+
+        out = []
+        cursor = ring.drain_into(out, 0)
+
+        # The producer advanced once mid-copy, so the oldest entry (2) is
+        # dropped; its slot is the next one a pending store could reuse.
+        self.assertEqual(out, _items(3, 4, 5))
+        self.assertEqual(cursor, 6)
+        out = []
+        self.assertEqual(ring.drain_into(out, cursor), 7)
+        self.assertEqual(out, _items(6))
+
+    def test_ignores_pending_store(self):
+        ring = RingLog(4)
+        for item in _items(0, 1, 2, 3):
+            ring.push(item)
+        # Producer stored entry 4 but has not advanced tail yet.
+        ring.buf[ring.tail % len(ring.buf)] = ("INFO", "4")
+
+        out = []
+        cursor = ring.drain_into(out, 0)
+        self.assertEqual(out, _items(0, 1, 2, 3))
+        self.assertEqual(ring.drain_into(out, cursor), 4)
+        self.assertEqual(out, _items(0, 1, 2, 3))
+
+        ring.tail += 1
+        out = []
+        self.assertEqual(ring.drain_into(out, cursor), 5)
+        self.assertEqual(out, _items(4))
+
+    def test_readers_keep_independent_cursors(self):
+        ring = RingLog(4)
+        for item in _items(0, 1):
+            ring.push(item)
+
+        first, second = [], []
+        first_cursor = ring.drain_into(first, 0)
+        ring.push(("INFO", "2"))
+        ring.drain_into(first, first_cursor)
+        ring.drain_into(second, 0)
+
+        self.assertEqual(first, _items(0, 1, 2))
+        self.assertEqual(second, _items(0, 1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()